@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -90,6 +91,19 @@ DATABASES = {
     }
 }
 
+# Tests only exercise ORM-portable queries, so run them against an
+# in-memory SQLite database instead of PostgreSQL to avoid disk
+# commits and network round-trips.
+if 'test' in sys.argv or 'pytest' in sys.modules:
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+
+    # No test verifies hasher strength, so make password hashing
+    # effectively free instead of paying for PBKDF2 per user.
+    PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
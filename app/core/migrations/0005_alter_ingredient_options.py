@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-08-30 16:42
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_recipe_image'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='ingredient',
+            options={'ordering': ['-name']},
+        ),
+    ]
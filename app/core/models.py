@@ -84,5 +84,8 @@ class Ingredient(models.Model):
         on_delete=models.CASCADE
     )
 
+    class Meta:
+        ordering = ['-name']
+
     def __str__(self):
         return self.name
@@ -1,7 +1,7 @@
 from decimal import Decimal
 from unittest.mock import patch
 
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 from django.contrib.auth import get_user_model
 
 from core import models
@@ -85,6 +85,9 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(ingredient), ingredient.name)
 
+
+class RecipeImagePathTests(SimpleTestCase):
+
     @patch('core.models.uuid.uuid4')
     def test_generate_recipe_image_file_path(self, mock_uuid):
         uuid = 'test-uuid'
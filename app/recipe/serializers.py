@@ -43,22 +43,29 @@ class RecipeSerializer(serializers.ModelSerializer):
     def _get_or_create_tags(self, recipe, tags):
         auth_user = self.context['request'].user
 
+        # Memoize lookups per request so duplicate names in one
+        # payload hit the database only once.
+        tag_objs = {}
         for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag,
-            )
-            recipe.tags.add(tag_obj)
+            if tag['name'] not in tag_objs:
+                tag_objs[tag['name']], created = Tag.objects.get_or_create(
+                    user=auth_user,
+                    **tag,
+                )
+        recipe.tags.add(*tag_objs.values())
 
     def _get_or_create_ingredients(self, recipe, ingredients):
         auth_user = self.context['request'].user
 
+        ingredient_objs = {}
         for ingredient in ingredients:
-            ingredient_obj, created = Ingredient.objects.get_or_create(
-                user=auth_user,
-                **ingredient,
-            )
-            recipe.ingredients.add(ingredient_obj)
+            if ingredient['name'] not in ingredient_objs:
+                obj, created = Ingredient.objects.get_or_create(
+                    user=auth_user,
+                    **ingredient,
+                )
+                ingredient_objs[ingredient['name']] = obj
+        recipe.ingredients.add(*ingredient_objs.values())
 
     def create(self, validated_data):
         tags = validated_data.pop('tags', [])
@@ -1,9 +1,11 @@
-import tempfile
+import io
 import os
 
 from decimal import Decimal
+from functools import lru_cache
 from PIL import Image
 
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.urls import reverse
@@ -14,38 +16,58 @@ from rest_framework import status
 from core.models import Recipe
 
 
+def _build_jpeg_bytes():
+    buffer = io.BytesIO()
+    Image.new('RGB', (10, 10)).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+JPEG_BYTES = _build_jpeg_bytes()
+
+
+@lru_cache(maxsize=None)
 def create_image_upload_url(recipe_id):
     return reverse('recipe:recipe-upload-image', args=[recipe_id])
 
 
 class PrivateImageUploadTests(TestCase):
 
-    def setUp(self):
-        self.client = APIClient()
-        self.user = get_user_model().objects.create_user(
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._client = APIClient()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
             email='testuser@example.com',
             password='testpass123',
         )
-        self.client.force_authenticate(self.user)
-        self.recipe = Recipe.objects.create(
-            user=self.user,
+        cls.recipe = Recipe.objects.create(
+            user=cls.user,
             title='test recipe',
             time_minutes=4,
             price=Decimal('3.30'),
         )
 
+    def setUp(self):
+        self.client = self._client
+        self.client.force_authenticate(self.user)
+
     def tearDown(self):
+        self.client.force_authenticate(user=None)
         self.recipe.image.delete()
 
     def test_upload_recipe_image_file(self):
         url = create_image_upload_url(recipe_id=self.recipe.id)
 
-        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file_name:
-            img = Image.new('RGB', (10, 10))
-            img.save(image_file_name, format='JPEG')
-            image_file_name.seek(0)
-            payload = {'image': image_file_name}
-            res = self.client.post(url, payload, format='multipart')
+        image_file = SimpleUploadedFile(
+            'test.jpg',
+            JPEG_BYTES,
+            content_type='image/jpeg',
+        )
+        payload = {'image': image_file}
+        res = self.client.post(url, payload, format='multipart')
 
         self.recipe.refresh_from_db()
         self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -1,14 +1,20 @@
 from decimal import Decimal
+from functools import lru_cache
 
 from django.contrib.auth import get_user_model
 from django.urls import reverse
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 
-from rest_framework.test import APIClient
+from rest_framework.test import (
+    APIClient,
+    APIRequestFactory,
+    force_authenticate,
+)
 from rest_framework import status
 
 from core.models import Ingredient, Recipe
 from recipe.serializers import IngredientSerializer
+from recipe.views import IngredientViewSet
 
 
 INGREDIENTS_URL = reverse('recipe:ingredient-list')
@@ -18,11 +24,21 @@ def create_user(email='user@example.com', password='testpass123'):
     return get_user_model().objects.create_user(email=email, password=password)
 
 
+def list_ingredients(user, params=None):
+    """Call the list view directly, skipping URL routing and
+    middleware."""
+    request = APIRequestFactory().get(INGREDIENTS_URL, params)
+    force_authenticate(request, user=user)
+    view = IngredientViewSet.as_view({'get': 'list'})
+    return view(request)
+
+
+@lru_cache(maxsize=None)
 def detail_url(ingredient_id):
     return reverse('recipe:ingredient-detail', args=[ingredient_id])
 
 
-class PublicIngredientApiTests(TestCase):
+class PublicIngredientApiTests(SimpleTestCase):
 
     def setUp(self):
         self.client = APIClient()
@@ -35,25 +51,35 @@ class PublicIngredientApiTests(TestCase):
 
 class PrivateIngredientApiTests(TestCase):
 
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._client = APIClient()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        Ingredient.objects.bulk_create([
+            Ingredient(user=cls.user, name='Salt'),
+            Ingredient(user=cls.user, name='Sugar'),
+        ])
+        cls.expected_ingredients_data = IngredientSerializer(
+            Ingredient.objects.filter(user=cls.user),
+            many=True,
+        ).data
+
     def setUp(self):
-        self.user = create_user()
-        self.client = APIClient()
+        self.client = self._client
         self.client.force_authenticate(self.user)
 
-    def test_get_ingredients_list(self):
-        Ingredient.objects.create(user=self.user, name='Salt')
-        Ingredient.objects.create(user=self.user, name='Sugar')
+    def tearDown(self):
+        self.client.force_authenticate(user=None)
 
-        res = self.client.get(INGREDIENTS_URL)
+    def test_get_ingredients_list(self):
+        res = list_ingredients(self.user)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-
-        ingredients = Ingredient.objects.filter(
-            user=self.user,
-        ).order_by('-name')
-        serializer = IngredientSerializer(ingredients, many=True)
-
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data, self.expected_ingredients_data)
 
     def test_get_ingredients_limited_to_user(self):
         new_user = create_user(
@@ -62,16 +88,10 @@ class PrivateIngredientApiTests(TestCase):
         )
         Ingredient.objects.create(user=new_user, name='Pepper')
 
-        Ingredient.objects.create(user=self.user, name='Salt')
-        res = self.client.get(INGREDIENTS_URL)
-
-        ingredients = Ingredient.objects.filter(
-            user=self.user
-        ).order_by('-name')
-        serializer = IngredientSerializer(ingredients, many=True)
+        res = list_ingredients(self.user)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data, self.expected_ingredients_data)
 
     def test_update_ingredient(self):
         ingredient_salt = Ingredient.objects.create(
@@ -85,7 +105,7 @@ class PrivateIngredientApiTests(TestCase):
         }
 
         res = self.client.patch(url, payload)
-        ingredient_salt.refresh_from_db()
+        ingredient_salt.refresh_from_db(fields=['name'])
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(payload['name'], ingredient_salt.name)
@@ -99,9 +119,7 @@ class PrivateIngredientApiTests(TestCase):
 
         res = self.client.delete(url)
 
-        ingredients = Ingredient.objects.filter(
-            user=self.user,
-        ).order_by('-name')
+        ingredients = Ingredient.objects.filter(id=ingredient_pepper.id)
 
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(ingredients.exists())
@@ -128,7 +146,8 @@ class PrivateIngredientApiTests(TestCase):
         s2 = IngredientSerializer(ing2)
 
         params = {'assigned_only': 1}
-        res = self.client.get(INGREDIENTS_URL, params)
+        with self.assertNumQueries(1):
+            res = list_ingredients(self.user, params)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertIn(s1.data, res.data)
@@ -161,5 +180,6 @@ class PrivateIngredientApiTests(TestCase):
         recipe2.ingredients.add(ing)
 
         params = {'assigned_only': 1}
-        res = self.client.get(INGREDIENTS_URL, params)
+        with self.assertNumQueries(1):
+            res = list_ingredients(self.user, params)
         self.assertEqual(len(res.data), 1)
@@ -1,38 +1,97 @@
 from decimal import Decimal
+from functools import lru_cache
+from types import MappingProxyType
 
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 from django.urls import reverse
 
-from rest_framework.test import APIClient
+from rest_framework.test import (
+    APIClient,
+    APIRequestFactory,
+    force_authenticate,
+)
 from rest_framework import status
 
 from core.models import Recipe, Tag, Ingredient
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
+from recipe.views import RecipeViewSet
 
 
 RECIPES_URL = reverse('recipe:recipe-list')
 
+PRICE_5_50 = Decimal('5.50')
+PRICE_3_50 = Decimal('3.50')
+PRICE_7_50 = Decimal('7.50')
+
+RECIPE_DEFAULTS = MappingProxyType({
+    'title': 'Sample Test Recipe',
+    'time_minutes': 5,
+    'price': PRICE_5_50,
+    'description': 'Sample Test Recipe Description',
+    'link': 'http://www.example.com/recipe.pdf',
+})
+
+
+PRE_HASHED_PASSWORD = make_password('testpass123')
+
+
+def create_user(**params):
+    return get_user_model().objects.create(
+        password=PRE_HASHED_PASSWORD,
+        **params,
+    )
+
+
+def result_ids(data):
+    return {row['id'] for row in data}
+
+
+def m2m_names(manager):
+    """Return the set of names behind a M2M manager in one query."""
+    return set(manager.values_list('name', flat=True))
+
+
+def build_recipe(user, **params):
+    """Return an unsaved Recipe instance with default fields."""
+    return Recipe(user=user, **{**RECIPE_DEFAULTS, **params})
+
 
 def create_recipe(user, **params):
-    defaults = {
-        'title': 'Sample Test Recipe',
-        'time_minutes': 5,
-        'price': Decimal('5.50'),
-        'description': 'Sample Test Recipe Description',
-        'link': 'http://www.example.com/recipe.pdf',
-    }
-    defaults.update(params)
-
-    recipe = Recipe.objects.create(user=user, **defaults)
+    recipe = build_recipe(user, **params)
+    recipe.save()
     return recipe
 
 
+def bulk_recipes(user, titles, **defaults):
+    Recipe.objects.bulk_create([
+        build_recipe(user, title=title, **defaults)
+        for title in titles
+    ])
+
+    # bulk_create does not return primary keys on SQLite, so fetch
+    # the rows back in insertion order.
+    return list(
+        Recipe.objects.filter(user=user, title__in=titles).order_by('id')
+    )
+
+
+def list_recipes(user, params=None):
+    """Call the list view directly, skipping URL routing and
+    middleware."""
+    request = APIRequestFactory().get(RECIPES_URL, params)
+    force_authenticate(request, user=user)
+    view = RecipeViewSet.as_view({'get': 'list'})
+    return view(request)
+
+
+@lru_cache(maxsize=None)
 def detail_url(recipe_id):
     return reverse('recipe:recipe-detail', args=[recipe_id])
 
 
-class PublicRecipeApiTests(TestCase):
+class PublicRecipeApiTests(SimpleTestCase):
 
     def setUp(self):
         self.client = APIClient()
@@ -45,39 +104,61 @@ class PublicRecipeApiTests(TestCase):
 
 class PrivateRecipeApiTests(TestCase):
 
-    def setUp(self):
-        self.client = APIClient()
-        self.user = get_user_model().objects.create_user(
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._client = APIClient()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
             email='test@example.com',
             password='passtest123',
             name='Test User',
         )
-        self.client.force_authenticate(self.user)
+        cls.other_user = create_user(
+            email='otheruser@example.com',
+            name='Other User',
+        )
 
-    def test_get_recipes_authorized_user(self):
-        create_recipe(user=self.user)
-        create_recipe(user=self.user)
+    def setUp(self):
+        self.client = self._client
+        self.client.force_authenticate(self.user)
 
-        res = self.client.get(RECIPES_URL)
+    def tearDown(self):
+        self.client.force_authenticate(user=None)
 
-        recipes = Recipe.objects.all().order_by('-id')
+    def test_get_recipes_authorized_user(self):
+        Recipe.objects.bulk_create([
+            build_recipe(self.user),
+            build_recipe(self.user),
+        ])
+
+        with self.assertNumQueries(3):
+            res = list_recipes(self.user)
+
+        recipes = Recipe.objects.all().prefetch_related(
+            'tags',
+            'ingredients',
+        ).order_by('-id')
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
     def test_get_recipes_belong_authorized_user(self):
-        other_user = get_user_model().objects.create_user(
-            email='otheruser@example.com',
-            password='otherpass123',
-            name='Other User',
-        )
-        create_recipe(user=other_user)
-        create_recipe(user=self.user)
+        Recipe.objects.bulk_create([
+            build_recipe(self.other_user),
+            build_recipe(self.user),
+        ])
 
-        res = self.client.get(RECIPES_URL)
+        with self.assertNumQueries(3):
+            res = list_recipes(self.user)
 
-        recipes = Recipe.objects.filter(user=self.user)
+        recipes = Recipe.objects.filter(user=self.user).prefetch_related(
+            'tags',
+            'ingredients',
+        )
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -87,7 +168,8 @@ class PrivateRecipeApiTests(TestCase):
         recipe = create_recipe(user=self.user)
 
         url = detail_url(recipe_id=recipe.id)
-        res = self.client.get(url)
+        with self.assertNumQueries(3):
+            res = self.client.get(url)
 
         serializer = RecipeDetailSerializer(recipe)
 
@@ -98,7 +180,7 @@ class PrivateRecipeApiTests(TestCase):
         payload = {
             'title': 'Sample Test Recipe',
             'time_minutes': 5,
-            'price': Decimal('5.50'),
+            'price': PRICE_5_50,
             'description': 'Sample Test Recipe Description',
             'link': 'http://www.example.com/recipe.pdf',
         }
@@ -124,7 +206,7 @@ class PrivateRecipeApiTests(TestCase):
         url = detail_url(recipe.id)
         res = self.client.patch(url, payload)
 
-        recipe.refresh_from_db()
+        recipe.refresh_from_db(fields=['title', 'link', 'user'])
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(recipe.title, payload['title'])
         self.assertEqual(recipe.link, original_url)
@@ -136,7 +218,7 @@ class PrivateRecipeApiTests(TestCase):
         payload = {
             'title': 'New Test Recipe',
             'time_minutes': 7,
-            'price': Decimal('7.50'),
+            'price': PRICE_7_50,
             'description': 'New Sample Test Recipe Description',
             'link': 'http://www.example.com/new_recipe.pdf',
         }
@@ -144,18 +226,14 @@ class PrivateRecipeApiTests(TestCase):
         url = detail_url(recipe.id)
         res = self.client.put(url, payload)
 
-        recipe.refresh_from_db()
+        recipe.refresh_from_db(fields=[*payload, 'user'])
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(recipe.user, self.user)
         for k, v in payload.items():
             self.assertEqual(getattr(recipe, k), v)
 
     def test_update_user_error(self):
-        new_user = get_user_model().objects.create_user(
-            email='newuser@example.com',
-            password='newpass1234',
-        )
-        payload = {'user': new_user.id}
+        payload = {'user': self.other_user.id}
 
         recipe = create_recipe(user=self.user)
 
@@ -175,12 +253,7 @@ class PrivateRecipeApiTests(TestCase):
         self.assertFalse(Recipe.objects.filter(id=recipe.id).exists())
 
     def test_delete_other_user_recipe_error(self):
-        new_user = get_user_model().objects.create_user(
-            email='newuser@example.com',
-            password='newpass1234',
-        )
-
-        recipe = create_recipe(user=new_user)
+        recipe = create_recipe(user=self.other_user)
         url = detail_url(recipe.id)
 
         res = self.client.delete(url)
@@ -192,7 +265,7 @@ class PrivateRecipeApiTests(TestCase):
         payload = {
             'title': 'Sample Test Recipe',
             'time_minutes': 7,
-            'price': Decimal('3.50'),
+            'price': PRICE_3_50,
             'tags': [
                 {'name': 'Fruity'},
                 {'name': 'Dinner'},
@@ -205,21 +278,17 @@ class PrivateRecipeApiTests(TestCase):
         recipes = Recipe.objects.filter(user=self.user)
         self.assertEqual(recipes.count(), 1)
         recipe = recipes[0]
-        self.assertEqual(recipe.tags.count(), 2)
-
-        for tag in payload['tags']:
-            exists = recipe.tags.filter(
-                user=self.user,
-                name=tag['name']
-            ).exists()
-            self.assertTrue(exists)
+        self.assertEqual(
+            m2m_names(recipe.tags),
+            {tag['name'] for tag in payload['tags']},
+        )
 
     def test_create_recipe_with_existing_tags(self):
         tag_breakfast = Tag.objects.create(user=self.user, name='Breakfast')
         payload = {
             'title': 'Sample Test Recipe',
             'time_minutes': 7,
-            'price': Decimal('3.50'),
+            'price': PRICE_3_50,
             'tags': [
                 {'name': 'Breakfast'},
                 {'name': 'Dessert'},
@@ -232,15 +301,11 @@ class PrivateRecipeApiTests(TestCase):
         recipes = Recipe.objects.filter(user=self.user)
         self.assertEqual(recipes.count(), 1)
         recipe = recipes[0]
-        self.assertEqual(recipe.tags.count(), 2)
         self.assertIn(tag_breakfast, recipe.tags.all())
-
-        for tag in payload['tags']:
-            exists = recipe.tags.filter(
-                user=self.user,
-                name=tag['name']
-            ).exists()
-            self.assertTrue(exists)
+        self.assertEqual(
+            m2m_names(recipe.tags),
+            {tag['name'] for tag in payload['tags']},
+        )
 
     def test_update_recipe_with_new_tag(self):
         recipe = create_recipe(user=self.user)
@@ -278,7 +343,7 @@ class PrivateRecipeApiTests(TestCase):
         payload = {
             'title': 'Sample Test Recipe',
             'time_minutes': 3,
-            'price': Decimal('3.50'),
+            'price': PRICE_3_50,
             'ingredients': [
                 {'name': 'Salt'},
                 {'name': 'Pepper'},
@@ -291,13 +356,10 @@ class PrivateRecipeApiTests(TestCase):
         recipes = Recipe.objects.filter(user=self.user)
         self.assertEqual(recipes.count(), 1)
         recipe = recipes[0]
-        self.assertEqual(recipe.ingredients.count(), 2)
-        for ingredient in payload['ingredients']:
-            exists = recipe.ingredients.filter(
-                user=self.user,
-                name=ingredient['name'],
-            ).exists()
-            self.assertTrue(exists)
+        self.assertEqual(
+            m2m_names(recipe.ingredients),
+            {ingredient['name'] for ingredient in payload['ingredients']},
+        )
 
     def test_create_recipe_with_existing_ingredients(self):
         ingredient_salt = Ingredient.objects.create(
@@ -308,7 +370,7 @@ class PrivateRecipeApiTests(TestCase):
         payload = {
             'title': 'Sample Test Recipe',
             'time_minutes': 3,
-            'price': Decimal('3.50'),
+            'price': PRICE_3_50,
             'ingredients': [
                 {'name': 'Salt'},
                 {'name': 'Pepper'},
@@ -321,125 +383,101 @@ class PrivateRecipeApiTests(TestCase):
         recipes = Recipe.objects.filter(user=self.user)
         self.assertEqual(recipes.count(), 1)
         recipe = recipes[0]
-        self.assertEqual(recipe.ingredients.count(), 2)
         self.assertIn(ingredient_salt, recipe.ingredients.all())
-        for ingredient in payload['ingredients']:
-            exists = recipe.ingredients.filter(
-                user=self.user,
-                name=ingredient['name']
-            ).exists()
-            self.assertTrue(exists)
+        self.assertEqual(
+            m2m_names(recipe.ingredients),
+            {ingredient['name'] for ingredient in payload['ingredients']},
+        )
 
-    def test_update_recipe_with_new_tags(self):
+    def test_update_recipe_ingredients(self):
         recipe = create_recipe(user=self.user)
         url = detail_url(recipe_id=recipe.id)
 
-        payload = {
-            'ingredients': [
-                {'name': 'Salt'},
-                {'name': 'SUgar'},
-            ]
-        }
+        with self.subTest('create new ingredients'):
+            payload = {
+                'ingredients': [
+                    {'name': 'Salt'},
+                    {'name': 'Sugar'},
+                ]
+            }
 
-        res = self.client.patch(url, payload, format='json')
+            res = self.client.patch(url, payload, format='json')
 
-        self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(recipe.ingredients.count(), 2)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(
+                m2m_names(recipe.ingredients),
+                {'Salt', 'Sugar'},
+            )
 
-        for ingredient in payload['ingredients']:
-            exists = recipe.ingredients.filter(
+        with self.subTest('assign existing ingredients'):
+            ingredient_salt = Ingredient.objects.get(
                 user=self.user,
-                name=ingredient['name'],
-            ).exists()
-            self.assertTrue(exists)
-
-    def test_update_recipe_with_existing_tags(self):
-        ingredient_salt = Ingredient.objects.create(
-            user=self.user,
-            name='Salt',
-        )
-        recipe = create_recipe(user=self.user)
-        url = detail_url(recipe_id=recipe.id)
-
-        payload = {
-            'ingredients': [
-                {'name': 'Salt'},
-                {'name': 'Pepper'},
-            ]
-        }
+                name='Salt',
+            )
+            payload = {
+                'ingredients': [
+                    {'name': 'Salt'},
+                    {'name': 'Pepper'},
+                ]
+            }
+
+            res = self.client.patch(url, payload, format='json')
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertIn(ingredient_salt, recipe.ingredients.all())
+            self.assertEqual(
+                m2m_names(recipe.ingredients),
+                {'Salt', 'Pepper'},
+            )
+
+        with self.subTest('clear ingredients'):
+            payload = {
+                'ingredients': []
+            }
+
+            res = self.client.patch(url, payload, format='json')
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(recipe.ingredients.count(), 0)
 
-        res = self.client.patch(url, payload, format='json')
-        self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(recipe.ingredients.count(), 2)
-        self.assertIn(ingredient_salt, recipe.ingredients.all())
-
-        for ingredient in payload['ingredients']:
-            exists = recipe.ingredients.filter(
-                user=self.user,
-                name=ingredient['name'],
-            ).exists()
-            self.assertTrue(exists)
-
-    def test_update_recipe_clear_tags(self):
-        ingredient_salt = Ingredient.objects.create(
+    def test_filter_recipes_by_tags(self):
+        r1, r2, _ = bulk_recipes(
             user=self.user,
-            name='Salt',
+            titles=['Chicken Kofte', 'Biryani', 'Aloo Matter'],
         )
-        recipe = create_recipe(user=self.user)
-        recipe.ingredients.add(ingredient_salt)
 
-        url = detail_url(recipe_id=recipe.id)
-
-        payload = {
-            'ingredients': []
-        }
-
-        res = self.client.patch(url, payload, format='json')
-        self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(recipe.ingredients.count(), 0)
-
-    def test_filter_recipes_by_tags(self):
-        r1 = create_recipe(user=self.user, title='Chicken Kofte')
-        r2 = create_recipe(user=self.user, title='Biryani')
-        r3 = create_recipe(user=self.user, title='Aloo Matter')
-
-        t1 = Tag.objects.create(user=self.user, name='Spicy')
-        t2 = Tag.objects.create(user=self.user, name='Masala dar')
+        Tag.objects.bulk_create([
+            Tag(user=self.user, name='Spicy'),
+            Tag(user=self.user, name='Masala dar'),
+        ])
+        t1, t2 = Tag.objects.filter(user=self.user).order_by('id')
 
         r1.tags.add(t1)
         r2.tags.add(t2)
 
-        s1 = RecipeSerializer(r1)
-        s2 = RecipeSerializer(r2)
-        s3 = RecipeSerializer(r3)
-
         params = {'tags': f'{t1.id},{t2.id}'}
         res = self.client.get(RECIPES_URL, params)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertIn(s1.data, res.data)
-        self.assertIn(s2.data, res.data)
-        self.assertNotIn(s3.data, res.data)
+        self.assertEqual(result_ids(res.data), {r1.id, r2.id})
 
     def test_filter_recipes_by_ingredients(self):
-        r1 = create_recipe(user=self.user, title='Chicken Kofte')
-        r2 = create_recipe(user=self.user, title='Biryani')
-        r3 = create_recipe(user=self.user, title='Aloo Matter')
+        r1, r2, _ = bulk_recipes(
+            user=self.user,
+            titles=['Chicken Kofte', 'Biryani', 'Aloo Matter'],
+        )
 
-        i1 = Ingredient.objects.create(user=self.user, name='Chicken Masala')
-        i2 = Ingredient.objects.create(user=self.user, name='Biryani Masala')
+        Ingredient.objects.bulk_create([
+            Ingredient(user=self.user, name='Chicken Masala'),
+            Ingredient(user=self.user, name='Biryani Masala'),
+        ])
+        i1, i2 = Ingredient.objects.filter(user=self.user).order_by('id')
 
         r1.ingredients.add(i1)
         r2.ingredients.add(i2)
 
-        s1 = RecipeSerializer(r1)
-        s2 = RecipeSerializer(r2)
-        s3 = RecipeSerializer(r3)
-
         params = {'ingredients': f'{i1.id},{i2.id}'}
         res = self.client.get(RECIPES_URL, params)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertIn(s1.data, res.data)
-        self.assertIn(s2.data, res.data)
-        self.assertNotIn(s3.data, res.data)
+        self.assertEqual(result_ids(res.data), {r1.id, r2.id})
@@ -1,18 +1,27 @@
 from decimal import Decimal
+from functools import lru_cache
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 from django.urls import reverse
 
-from rest_framework.test import APIClient
+from rest_framework.test import (
+    APIClient,
+    APIRequestFactory,
+    force_authenticate,
+)
 from rest_framework import status
 
 from core.models import Tag, Recipe
 from recipe.serializers import TagSerializer
+from recipe.views import TagViewSet
 
 
 TAGS_URL = reverse('recipe:tag-list')
 
+PRICE_4 = Decimal('4')
+PRICE_3 = Decimal('3')
+
 
 def create_tag(user, name):
     return Tag.objects.create(user=user, name=name)
@@ -22,14 +31,30 @@ def create_user(email='user@example.com', password='userpass123'):
     return get_user_model().objects.create_user(email=email, password=password)
 
 
+def list_tags(user, params=None):
+    """Call the list view directly, skipping URL routing and
+    middleware."""
+    request = APIRequestFactory().get(TAGS_URL, params)
+    force_authenticate(request, user=user)
+    view = TagViewSet.as_view({'get': 'list'})
+    return view(request)
+
+
+@lru_cache(maxsize=None)
 def detail_url(tag_id):
     return reverse('recipe:tag-detail', args=[tag_id])
 
 
-class PublicTagApiTests(TestCase):
+@lru_cache(maxsize=1)
+def shared_client():
+    """Build the APIClient once and reuse it across tests."""
+    return APIClient()
+
+
+class PublicTagApiTests(SimpleTestCase):
 
     def setUp(self):
-        self.client = APIClient()
+        self.client = shared_client()
 
     def test_retrieve_tags_list(self):
         res = self.client.get(TAGS_URL)
@@ -39,22 +64,33 @@ class PublicTagApiTests(TestCase):
 
 class PrivateTagApiTests(TestCase):
 
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        Tag.objects.bulk_create([
+            Tag(user=cls.user, name='Dessert'),
+            Tag(user=cls.user, name='Fruity'),
+        ])
+        cls.tag_dessert, cls.tag_fruity = Tag.objects.filter(
+            user=cls.user,
+        ).order_by('id')
+        cls.expected_tags_data = TagSerializer(
+            Tag.objects.filter(user=cls.user).order_by('-name'),
+            many=True,
+        ).data
+
     def setUp(self):
-        self.client = APIClient()
-        self.user = create_user()
+        self.client = shared_client()
         self.client.force_authenticate(self.user)
 
-    def test_get_tags_list(self):
-        create_tag(user=self.user, name='Dessert')
-        create_tag(user=self.user, name='Fruity')
-
-        res = self.client.get(TAGS_URL)
+    def tearDown(self):
+        self.client.force_authenticate(user=None)
 
-        tags = Tag.objects.filter(user=self.user).order_by('-name')
-        serializer = TagSerializer(tags, many=True)
+    def test_get_tags_list(self):
+        res = list_tags(self.user)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data, self.expected_tags_data)
 
     def test_get_tags_limited_to_user(self):
         new_user = create_user(
@@ -64,12 +100,13 @@ class PrivateTagApiTests(TestCase):
         create_tag(user=new_user, name='Dessert')
         tag = create_tag(user=self.user, name='Salty')
 
-        res = self.client.get(TAGS_URL)
+        res = list_tags(self.user)
+
+        expected_ids = {row['id'] for row in self.expected_tags_data}
+        expected_ids.add(tag.id)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['id'], tag.id)
-        self.assertEqual(res.data[0]['name'], tag.name)
+        self.assertEqual({row['id'] for row in res.data}, expected_ids)
 
     def test_update_tag(self):
         tag = create_tag(user=self.user, name='Sweet')
@@ -90,73 +127,60 @@ class PrivateTagApiTests(TestCase):
 
         res = self.client.delete(url)
 
-        tags = Tag.objects.filter(user=self.user)
+        tags = Tag.objects.filter(id=tag.id)
 
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(tags.exists())
 
     def test_filter_tags_assigned_to_recipes(self):
-        tag1 = Tag.objects.create(
-            user=self.user,
-            name='Dessert',
-        )
-        tag2 = Tag.objects.create(
-            user=self.user,
-            name='Spicy',
-        )
-
-        r1 = Recipe.objects.create(
-            user=self.user,
-            title='Cake',
-            time_minutes=5,
-            price=Decimal('4'),
-        )
-        r2 = Recipe.objects.create(
-            user=self.user,
-            title='Biryani',
-            time_minutes=7,
-            price=Decimal('3'),
-        )
-
-        r1.tags.add(tag1)
-        r2.tags.add(tag1)
-
-        s1 = TagSerializer(tag1)
-        s2 = TagSerializer(tag2)
+        Recipe.objects.bulk_create([
+            Recipe(
+                user=self.user,
+                title='Cake',
+                time_minutes=5,
+                price=PRICE_4,
+            ),
+            Recipe(
+                user=self.user,
+                title='Biryani',
+                time_minutes=7,
+                price=PRICE_3,
+            ),
+        ])
+        r1, r2 = Recipe.objects.filter(user=self.user).order_by('id')
+
+        r1.tags.add(self.tag_dessert)
+        r2.tags.add(self.tag_dessert)
 
         params = {'assigned_only': 1}
-        res = self.client.get(TAGS_URL, params)
+        res = list_tags(self.user, params)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertIn(s1.data, res.data)
-        self.assertNotIn(s2.data, res.data)
-
-    def test_filter_unique_tag_assigned_to_recipes(self):
-        tag = Tag.objects.create(
-            user=self.user,
-            name='Dessert'
-        )
-        Tag.objects.create(
-            user=self.user,
-            name='Spicy',
-        )
-
-        r1 = Recipe.objects.create(
-            user=self.user,
-            title='Cake',
-            time_minutes=5,
-            price=Decimal('4'),
-        )
-        r2 = Recipe.objects.create(
-            user=self.user,
-            title='Biryani',
-            time_minutes=7,
-            price=Decimal('3'),
+        self.assertEqual(
+            {row['id'] for row in res.data},
+            {self.tag_dessert.id},
         )
 
-        r1.tags.add(tag)
-        r2.tags.add(tag)
+    def test_filter_unique_tag_assigned_to_recipes(self):
+        Recipe.objects.bulk_create([
+            Recipe(
+                user=self.user,
+                title='Cake',
+                time_minutes=5,
+                price=PRICE_4,
+            ),
+            Recipe(
+                user=self.user,
+                title='Biryani',
+                time_minutes=7,
+                price=PRICE_3,
+            ),
+        ])
+        r1, r2 = Recipe.objects.filter(user=self.user).order_by('id')
+
+        r1.tags.add(self.tag_dessert)
+        r2.tags.add(self.tag_dessert)
 
         params = {'assigned_only': 1}
-        res = self.client.get(TAGS_URL, params)
+        res = list_tags(self.user, params)
         self.assertEqual(len(res.data), 1)
@@ -67,7 +67,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         return queryset.filter(
             user=self.request.user,
-        ).order_by('-id').distinct()
+        ).prefetch_related('tags', 'ingredients').order_by('-id').distinct()
 
     def get_serializer_class(self):
         if self.action == 'list':